@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload format changes; extraction settings are part of the key
+CACHE_VERSION = "1"
+
+class CacheStore:
+    """Persistent on-disk cache of gzipped crawl output, keyed by URL"""
+
+    def __init__(self, cache_dir: Path, ttl_seconds: int):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(namespace: str, url: str, settings: str = "") -> str:
+        """
+        Build the cache key for a URL within a namespace (e.g. 'markdown', 'discover').
+
+        settings is a serialized description of whatever produced the value, so
+        entries written under different settings never collide.
+        """
+        settings_hash = hashlib.sha256(settings.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{namespace}|{CACHE_VERSION}|{settings_hash}|{url}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.gz"
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                # Drop expired entries so URLs that are never requested again don't pile up
+                path.unlink(missing_ok=True)
+                return None
+            return gzip.decompress(path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a uniquely named temporary file first so readers never see a
+        # partial entry and concurrent writers of the same key don't clobber each other
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(value))
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached value, or None if missing, expired or unreadable"""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._read, key)
+        except (OSError, EOFError, zlib.error) as e:
+            logger.warning("Error reading cache entry %s: %s", key, e)
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a value; failures are logged and otherwise ignored"""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, value)
+        except OSError as e:
+            logger.warning("Error writing cache entry %s: %s", key, e)
+
+cache_store = CacheStore(
+    cache_dir=Path(os.getenv(
+        "CRAWL_CACHE_DIR",
+        str(Path(__file__).parents[2] / "storage" / "cache")
+    )),
+    ttl_seconds=int(os.getenv("CRAWL_CACHE_TTL", str(24 * 60 * 60)))
+)
@@ -42,7 +42,7 @@ class CrawlConfigManager:
             cache_mode=CacheMode.ENABLED,
             exclude_external_links=False,
             exclude_social_media_links=True,
-            wait_until='networkidle',
+            wait_until='domcontentloaded',
             page_timeout=120000,
             simulate_user=True,
             magic=True,
@@ -81,7 +81,7 @@ class CrawlConfigManager:
             exclude_social_media_links=True,
             
             # Page loading settings
-            wait_until='networkidle',
+            wait_until='domcontentloaded',
             page_timeout=120000,
             
             # Core features
@@ -1,12 +1,30 @@
-from typing import List, Optional, Set
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Set, Union
+import asyncio
+import io
+import json
 import logging
+import multiprocessing
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from pydantic import BaseModel
+from functools import lru_cache
+import aiohttp
+from pydantic import BaseModel, ConfigDict
+from .cache import cache_store
+from .html_convert import (
+    HTML2TEXT_OPTIONS,
+    PRUNING_FILTER_OPTIONS,
+    WORD_COUNT_THRESHOLD,
+    convert_static_html,
+    get_markdown_generator,
+)
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from crawl4ai.content_filter_strategy import PruningContentFilter
-from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
-from urllib.parse import urljoin, urlparse
+from urllib.parse import SplitResult, urljoin, urlsplit, urlunsplit
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,24 +32,88 @@ logger = logging.getLogger(__name__)
 # Increase recursion limit for complex pages
 sys.setrecursionlimit(10000)
 
+# Links to auth/account pages are never worth crawling; match whole path segments only
+EXCLUDED_PATH_RE = re.compile(
+    r"/(login|signup|register|logout|account|profile|admin)(?:[/?#]|$)",
+    re.IGNORECASE
+)
+
+SIZE_UNITS = ("B", "KB", "MB", "GB")
+
+# Settings that shape the extracted markdown are hashed into every disk cache
+# key, so changing them invalidates entries produced with the old values
+EXTRACTION_SETTINGS = json.dumps({
+    "word_count_threshold": WORD_COUNT_THRESHOLD,
+    "pruning_filter": PRUNING_FILTER_OPTIONS,
+    "html2text": HTML2TEXT_OPTIONS
+}, sort_keys=True)
+
+# Parsing and converting static HTML is CPU-bound, so it runs in worker processes
+# to keep the event loop free for in-flight fetches; see _get_convert_pool().
+# Each worker is a separate interpreter, so the default pool is kept small
+CONVERT_WORKERS = int(os.getenv("CONVERT_WORKERS", str(min(2, os.cpu_count() or 1))))
+_convert_pool: Optional[ProcessPoolExecutor] = None
+
+# Shared crawler (and its browser) reused across requests; see get_crawler()
+_crawler: Optional[AsyncWebCrawler] = None
+_crawler_lock = asyncio.Lock()
+
+# Number of worker tasks crawl_pages uses to fetch pages concurrently
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "10"))
+
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# Connection pool limits for the plain HTTP fetches
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "75"))
+
+# Shared HTTP session for the plain fetches; see get_session()
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+# Each browser render holds a heavyweight Chromium page, so renders are capped
+# process-wide, independently of how many pages are being fetched
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", str(max(2, (os.cpu_count() or 1) // 2))))
+RENDER_SEM = asyncio.Semaphore(RENDER_CONCURRENCY)
+
+# Transient render failures (timeouts, dropped connections, 5xx) are retried with
+# exponential backoff: RENDER_RETRY_BASE_DELAY, doubling, capped at RENDER_RETRY_MAX_DELAY
+RENDER_ATTEMPTS = int(os.getenv("RENDER_ATTEMPTS", "3"))
+RENDER_RETRY_BASE_DELAY = 1.0
+RENDER_RETRY_MAX_DELAY = 10.0
+# Matched against the error line only: crawl4ai appends a "Code context:" block of
+# its own source, which mentions page_timeout for every navigation failure
+TRANSIENT_ERROR_RE = re.compile(
+    r"Timeout \d+ms exceeded"
+    r"|net::ERR_(?:CONNECTION_(?:RESET|CLOSED|REFUSED|TIMED_OUT)|TIMED_OUT"
+    r"|NETWORK_CHANGED|INTERNET_DISCONNECTED|EMPTY_RESPONSE)"
+)
+
 class InternalLink(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     href: str
     text: str
     status: str = 'pending'  # Default status for internal links
 
 class DiscoveredPage(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     url: str
     title: Optional[str] = None
     status: str = "pending"  # Default status for parent pages
     internalLinks: Optional[List[InternalLink]] = None
 
-class CrawlStats(BaseModel):
+@dataclass(slots=True, frozen=True)
+class CrawlStats:
     subdomains_parsed: int = 0
     pages_crawled: int = 0
     data_extracted: str = "0 KB"
     errors_encountered: int = 0
 
-class CrawlResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class CrawlResult:
     markdown: str
     stats: CrawlStats
 
@@ -53,43 +135,104 @@ def get_browser_config() -> BrowserConfig:
         ]
     )
 
-def get_crawler_config(session_id: str = None) -> CrawlerRunConfig:
-    """Get crawler configuration for content extraction"""
-    markdown_generator = DefaultMarkdownGenerator(
-        content_filter=PruningContentFilter(
-            threshold=0.2,
-            threshold_type="dynamic",
-            min_word_threshold=5
-        ),
-        options={
-            "body_width": 80,
-            "ignore_images": True,
-            "escape_html": True
-        }
-    )
-    
+# Memoized and shared across requests. crawl4ai writes to the config it is given
+# (e.g. config.url during a render), so each arun call gets its own clone
+@lru_cache(maxsize=8)
+def get_crawler_config(
+    session_id: str = None,
+    *,
+    scan_full_page: bool = False,
+    magic: bool = False
+) -> CrawlerRunConfig:
+    """
+    Get crawler configuration for content extraction.
+
+    scan_full_page (scroll through the page to trigger lazy loading) and magic
+    (anti-bot heuristics) each add seconds per page and are rarely needed for
+    documentation sites, so they are only enabled for deep crawls.
+    """
     return CrawlerRunConfig(
-        word_count_threshold=5,
-        markdown_generator=markdown_generator,
+        word_count_threshold=WORD_COUNT_THRESHOLD,
+        markdown_generator=get_markdown_generator(),
         cache_mode=CacheMode.ENABLED,
         verbose=True,
         wait_until='domcontentloaded',
-        wait_for_images=True,
-        scan_full_page=True,
+        wait_for_images=False,  # images are dropped from the markdown anyway
+        scan_full_page=scan_full_page,
         scroll_delay=0.5,
         page_timeout=120000,
         screenshot=False,
         pdf=False,
-        magic=True
+        magic=magic
     )
 
-def normalize_url(url: str) -> str:
-    """Normalize URL by removing trailing slashes and fragments"""
-    parsed = urlparse(url)
+async def get_crawler() -> AsyncWebCrawler:
+    """Get the process-wide crawler, launching its browser on first use"""
+    global _crawler
+    async with _crawler_lock:
+        if _crawler is None:
+            crawler = AsyncWebCrawler(config=get_browser_config())
+            await crawler.__aenter__()
+            _crawler = crawler
+    return _crawler
+
+async def close_crawler() -> None:
+    """Shut down the process-wide crawler and its browser, if one was started"""
+    global _crawler
+    async with _crawler_lock:
+        if _crawler is not None:
+            crawler, _crawler = _crawler, None
+            await crawler.__aexit__(None, None, None)
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the process-wide HTTP session, whose pooled keep-alive connections are reused across requests"""
+    global _session
+    async with _session_lock:
+        if _session is None or _session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+                ssl=False  # match the browser, which ignores HTTPS errors
+            )
+            _session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+    return _session
+
+async def close_session() -> None:
+    """Close the process-wide HTTP session and its pooled connections, if one was opened"""
+    global _session
+    async with _session_lock:
+        if _session is not None:
+            session, _session = _session, None
+            await session.close()
+
+@asynccontextmanager
+async def _use_crawler(crawler: Optional[AsyncWebCrawler] = None) -> AsyncIterator[AsyncWebCrawler]:
+    """Yield the given crawler, or a temporary one that is closed on exit"""
+    if crawler is not None:
+        yield crawler
+        return
+    async with AsyncWebCrawler(config=get_browser_config()) as temporary_crawler:
+        yield temporary_crawler
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count using the largest fitting binary unit, up to GB"""
+    unit_index = min((num_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1) if num_bytes > 0 else 0
+    if unit_index == 0:
+        return f"{num_bytes} B"
+    return f"{num_bytes / (1 << (10 * unit_index)):.2f} {SIZE_UNITS[unit_index]}"
+
+def _normalize_split_url(parsed: SplitResult) -> str:
+    """Normalize an already split URL; see normalize_url"""
     path = parsed.path.rstrip('/')
     if not path:
         path = '/'
-    return f"{parsed.scheme}://{parsed.netloc}{path}"
+    return urlunsplit((parsed.scheme.lower(), parsed.netloc.lower(), path, '', ''))
+
+def normalize_url(url: str) -> str:
+    """Normalize URL into a dedup key: lowercase scheme/host, no trailing slash, query or fragment"""
+    return _normalize_split_url(urlsplit(url))
 
 async def discover_pages(
     url: str,
@@ -97,8 +240,16 @@ async def discover_pages(
     current_depth: int = 1,
     seen_urls: Set[str] = None,
     parent_urls: Set[str] = None,
-    all_internal_links: Set[str] = None
-) -> List[DiscoveredPage]:
+    all_internal_links: Set[str] = None,
+    crawler: Optional[AsyncWebCrawler] = None,
+    deep: bool = False
+) -> AsyncIterator[DiscoveredPage]:
+    """
+    Discover pages reachable from url, yielding each page as soon as its links are known.
+
+    Pages come out depth-first in discovery order, so a consumer such as
+    crawl_pages can start fetching them while discovery is still running.
+    """
     if seen_urls is None:
         seen_urls = set()
     if parent_urls is None:
@@ -107,59 +258,49 @@ async def discover_pages(
         all_internal_links = set()
     
     url = normalize_url(url)
-    discovered_pages = []
-    logger.info(f"Starting discovery for URL: {url} at depth {current_depth}/{max_depth}")
+    logger.info("Starting discovery for URL: %s at depth %s/%s", url, current_depth, max_depth)
     
     if url in seen_urls or current_depth > max_depth:
-        logger.info(f"Skipping URL: {url} (seen: {url in seen_urls}, depth: {current_depth})")
-        return discovered_pages
+        logger.info("Skipping URL: %s (seen: %s, depth: %s)", url, url in seen_urls, current_depth)
+        return
         
     seen_urls.add(url)
     parent_urls.add(url)
     
     try:
-        browser_config = get_browser_config()
-        crawler_config = get_crawler_config()
+        crawler_config = get_crawler_config(scan_full_page=deep, magic=deep)
         
-        async with AsyncWebCrawler(config=browser_config) as crawler:
+        async with _use_crawler(crawler) as crawler:
             try:
-                result = await crawler.arun(url=url, config=crawler_config)
-                
-                title = "Untitled Page"
-                if result.markdown_v2 and result.markdown_v2.fit_markdown:
-                    content_lines = result.markdown_v2.fit_markdown.split('\n')
-                    if content_lines:
-                        potential_title = content_lines[0].strip('# ').strip()
-                        if potential_title:
-                            title = potential_title
+                page_info = await _get_page_info(crawler, url, crawler_config, deep)
+                title = page_info["title"]
 
                 internal_links = []
-                if hasattr(result, 'links') and isinstance(result.links, dict):
+                if page_info["links"]:
                     seen_internal_links = set()
+                    base_domain = urlsplit(url).netloc
                     
-                    for link in result.links.get("internal", []):
+                    for link in page_info["links"]:
                         href = link.get("href", "")
                         if not href:
                             continue
                             
-                        if not href.startswith(('http://', 'https://')):
-                            href = urljoin(url, href)
-                        href = normalize_url(href)
+                        # Parse once; only relative links need joining (and re-parsing)
+                        parts = urlsplit(href)
+                        if not parts.scheme:
+                            parts = urlsplit(urljoin(url, href))
+                        if parts.scheme.lower() not in ('http', 'https'):
+                            continue
+                        if parts.netloc.lower() != base_domain:
+                            continue
+                        href = _normalize_split_url(parts)
                             
                         if (href in parent_urls or 
                             href in all_internal_links or 
                             href in seen_internal_links):
                             continue
                             
-                        if any(excluded in href.lower() for excluded in [
-                            "login", "signup", "register", "logout",
-                            "account", "profile", "admin"
-                        ]):
-                            continue
-                            
-                        base_domain = urlparse(url).netloc
-                        link_domain = urlparse(href).netloc
-                        if base_domain != link_domain:
+                        if EXCLUDED_PATH_RE.search(href):
                             continue
                             
                         seen_internal_links.add(href)
@@ -170,157 +311,375 @@ async def discover_pages(
                             text=link.get("text", "").strip()
                         ))
                     
-                    logger.info(f"Found {len(internal_links)} unique internal links at depth {current_depth}")
+                    logger.info("Found %s unique internal links at depth %s", len(internal_links), current_depth)
 
-                primary_page = DiscoveredPage(
+                yield DiscoveredPage(
                     url=url,
                     title=title,
                     internalLinks=internal_links
                 )
-                discovered_pages.append(primary_page)
 
                 if current_depth < max_depth:
                     for link in internal_links:
-                        sub_pages = await discover_pages(
+                        async for sub_page in discover_pages(
                             url=link.href,
                             max_depth=max_depth,
                             current_depth=current_depth + 1,
                             seen_urls=seen_urls,
                             parent_urls=parent_urls,
-                            all_internal_links=all_internal_links
-                        )
-                        discovered_pages.extend(sub_pages)
+                            all_internal_links=all_internal_links,
+                            crawler=crawler,
+                            deep=deep
+                        ):
+                            yield sub_page
 
             except Exception as e:
-                logger.error(f"Error crawling {url}: {str(e)}")
-                discovered_pages.append(
-                    DiscoveredPage(
-                        url=url,
-                        title="Error Page",
-                        status="error"
-                    )
+                logger.error("Error crawling %s: %s", url, e)
+                yield DiscoveredPage(
+                    url=url,
+                    title="Error Page",
+                    status="error"
                 )
 
-            return discovered_pages
-
     except Exception as e:
-        logger.error(f"Error discovering pages: {str(e)}")
-        return [DiscoveredPage(url=url, title="Main Page", status="error")]
+        logger.error("Error discovering pages: %s", e)
+        yield DiscoveredPage(url=url, title="Main Page", status="error")
+
+async def _get_page_info(crawler: AsyncWebCrawler, url: str, crawler_config: CrawlerRunConfig, deep: bool) -> dict:
+    """Get a page's title and raw internal links, from the disk cache when possible"""
+    key = cache_store.make_key("discover:deep" if deep else "discover", url, EXTRACTION_SETTINGS)
+    cached = await cache_store.get(key)
+    if cached is not None:
+        logger.info("Using cached discovery result for %s", url)
+        return json.loads(cached)
+
+    result = await _render(crawler, url, crawler_config)
+
+    title = "Untitled Page"
+    if result.markdown_v2 and result.markdown_v2.fit_markdown:
+        content_lines = result.markdown_v2.fit_markdown.split('\n')
+        if content_lines:
+            potential_title = content_lines[0].strip('# ').strip()
+            if potential_title:
+                title = potential_title
+
+    links = []
+    if hasattr(result, 'links') and isinstance(result.links, dict):
+        links = [
+            {"href": link.get("href", ""), "text": link.get("text", "")}
+            for link in result.links.get("internal", [])
+        ]
+
+    page_info = {"title": title, "links": links}
+    if result.success and _is_ok_response(result):
+        await cache_store.set(key, json.dumps(page_info).encode('utf-8'))
+    return page_info
+
+def _is_ok_response(result) -> bool:
+    """Check whether a crawl result came from a 2xx response, i.e. is safe to cache"""
+    return 200 <= (getattr(result, 'status_code', None) or 0) < 300
+
+async def _render_once(crawler: AsyncWebCrawler, url: str, crawler_config: CrawlerRunConfig):
+    """Render a page in the browser, waiting for a free render slot first"""
+    async with RENDER_SEM:
+        return await crawler.arun(url=url, config=crawler_config.clone())
 
-async def crawl_pages(pages: List[DiscoveredPage]) -> CrawlResult:
+def _is_transient_failure(result) -> bool:
+    """Check whether a crawl result failed in a way that is worth retrying"""
+    if (getattr(result, 'status_code', None) or 0) >= 500:
+        return True
+    if result.success:
+        return False
+    error_line = (result.error_message or "").split("Code context:", 1)[0]
+    return bool(TRANSIENT_ERROR_RE.search(error_line))
+
+async def _render(crawler: AsyncWebCrawler, url: str, crawler_config: CrawlerRunConfig):
+    """Render a page in the browser, retrying transient failures with exponential backoff"""
+    # crawl4ai caches 5xx pages as successful results (without their status), so
+    # retries must bypass its cache to actually reach the network again
+    retry_config = crawler_config.clone(cache_mode=CacheMode.BYPASS)
+    for attempt in range(1, RENDER_ATTEMPTS + 1):
+        try:
+            result = await _render_once(crawler, url, crawler_config if attempt == 1 else retry_config)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            if attempt == RENDER_ATTEMPTS:
+                raise
+            reason = str(e)
+        else:
+            if result is None or attempt == RENDER_ATTEMPTS or not _is_transient_failure(result):
+                return result
+            reason = (result.error_message or f"HTTP {result.status_code}").split("Code context:", 1)[0].strip()
+
+        delay = min(RENDER_RETRY_MAX_DELAY, RENDER_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        logger.warning("Render of %s failed (attempt %s/%s): %s; retrying in %.0fs", url, attempt, RENDER_ATTEMPTS, reason, delay)
+        await asyncio.sleep(delay)
+
+def _get_convert_pool() -> ProcessPoolExecutor:
+    """Get the process pool for HTML-to-markdown conversion, starting it on first use"""
+    global _convert_pool
+    if _convert_pool is None:
+        _convert_pool = ProcessPoolExecutor(
+            max_workers=CONVERT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _convert_pool
+
+def _reset_convert_pool(broken_pool: ProcessPoolExecutor) -> None:
+    """Drop a broken conversion pool so the next conversion starts a fresh one"""
+    global _convert_pool
+    # Other pages may report the same broken pool after it was already replaced
+    if _convert_pool is broken_pool:
+        _convert_pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_convert_pool() -> None:
+    """Stop the conversion process pool, if one was started"""
+    global _convert_pool
+    if _convert_pool is not None:
+        pool, _convert_pool = _convert_pool, None
+        pool.shutdown(cancel_futures=True)
+
+async def _fetch_html(page: DiscoveredPage, session: aiohttp.ClientSession) -> Optional[str]:
+    """Fetch a page's raw HTML over plain HTTP, or None if it can't be used directly"""
+    try:
+        async with session.get(page.url) as response:
+            if response.status != 200 or response.content_type != 'text/html':
+                logger.info("HTTP fetch of %s returned %s %s", page.url, response.status, response.content_type)
+                return None
+            return await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as e:
+        logger.info("HTTP fetch of %s failed: %s", page.url, e)
+        return None
+
+async def _fetch_or_render(
+    page: DiscoveredPage,
+    session: aiohttp.ClientSession,
+    crawler: AsyncWebCrawler,
+    crawler_config: CrawlerRunConfig,
+    deep: bool
+):
+    """
+    Get the markdown content for a page.
+
+    Pages are served from the disk cache when possible. Server-rendered pages are
+    converted straight from their HTTP response; only pages that look like they
+    need JavaScript are rendered in the browser. Deep crawls always render, since
+    full-page scrolling and magic mode only apply in the browser.
+    """
+    key = cache_store.make_key("markdown:deep" if deep else "markdown", page.url, EXTRACTION_SETTINGS)
+    cached = await cache_store.get(key)
+    if cached is not None:
+        logger.info("Using cached markdown for %s", page.url)
+        return cached.decode('utf-8')
+
+    html = None if deep else await _fetch_html(page, session)
+    markdown = None
+    if html is not None:
+        pool = _get_convert_pool()
+        try:
+            markdown = await asyncio.get_running_loop().run_in_executor(
+                pool, convert_static_html, html, page.url
+            )
+        except BrokenProcessPool as e:
+            logger.error("Conversion pool broke while converting %s: %s; restarting it", page.url, e)
+            _reset_convert_pool(pool)
+        except Exception as e:
+            # A failed conversion should not fail the page; fall back to the browser
+            logger.error("Error converting static HTML for %s: %s", page.url, e)
+    if markdown is not None:
+        logger.info("Converted static HTML for page: %s", page.url)
+        # _fetch_html only returns the body of a 200 response
+        cacheable = True
+    else:
+        logger.info("Crawling page: %s", page.url)
+        result = await _render(crawler, page.url, crawler_config)
+        markdown = result.markdown_v2 if result else None
+        cacheable = result is not None and _is_ok_response(result)
+
+    content = _select_markdown(page, markdown)
+    if content and cacheable:
+        await cache_store.set(key, content.encode('utf-8'))
+    return content
+
+def _select_markdown(page: DiscoveredPage, markdown) -> Optional[str]:
+    """Pick the best available markdown variant from a generation result"""
+    if not markdown:
+        logger.warning("Skipping %s - no valid result", page.url)
+        return None
+
+    content = None
+    if hasattr(markdown, 'fit_markdown') and markdown.fit_markdown:
+        content = markdown.fit_markdown
+        logger.info("Using fit_markdown for %s", page.url)
+    elif hasattr(markdown, 'raw_markdown') and markdown.raw_markdown:
+        content = markdown.raw_markdown
+        logger.info("Falling back to raw_markdown for %s", page.url)
+
+    if not content:
+        logger.warning("Skipping %s - no markdown content available", page.url)
+    return content
+
+def _extract_page_markdown(page: DiscoveredPage, content: Optional[str]) -> Optional[str]:
+    """Build the filtered markdown section for a crawled page, or None if nothing usable was extracted"""
+    if not content:
+        return None
+
+    filtered_lines = []
+    skip_next = False
+    for line in content.split('\n'):
+        if skip_next:
+            skip_next = False
+            continue
+            
+        if 'To navigate the symbols, press' in line:
+            skip_next = True
+            continue
+            
+        if any(x in line for x in [
+            'Skip Navigation',
+            'Search...',
+            '⌘K',
+            'symbols inside <root>'
+        ]):
+            continue
+            
+        filtered_lines.append(line)
+
+    filtered_content = '\n'.join(filtered_lines).strip()
+    if not filtered_content:
+        logger.warning("Skipping %s - filtered content was empty", page.url)
+        return None
+
+    return (
+        f"# {page.title or 'Untitled Page'}\n"
+        f"URL: {page.url}\n\n"
+        f"{filtered_content}\n\n---\n\n"
+    )
+
+async def _iter_pages(
+    pages: Union[Iterable[DiscoveredPage], AsyncIterable[DiscoveredPage]]
+) -> AsyncIterator[DiscoveredPage]:
+    """Iterate over a plain or async iterable of pages"""
+    if isinstance(pages, AsyncIterable):
+        async for page in pages:
+            yield page
+    else:
+        for page in pages:
+            yield page
+
+async def crawl_pages(
+    pages: Union[Iterable[DiscoveredPage], AsyncIterable[DiscoveredPage]],
+    crawler: Optional[AsyncWebCrawler] = None,
+    deep: bool = False
+) -> CrawlResult:
     """
     Crawl multiple pages and combine their content into a single markdown document.
+
+    Pages are fetched by CRAWL_CONCURRENCY worker tasks sharing a single crawler.
+    pages may be an async iterator (e.g. discover_pages), in which case fetching
+    starts as soon as the first page is yielded. Pass the shared crawler from
+    get_crawler() to reuse its browser; otherwise a temporary one is launched.
+    Pages whose plain HTTP response is already server-rendered skip the browser,
+    and pages seen within the cache TTL are not fetched at all. Set deep to
+    enable full-page scrolling and magic mode for pages that need them.
     """
-    all_markdown = []
+    markdown_buffer = io.BytesIO()
     total_size = 0
     errors = 0
     crawled_urls = set()
+    pages_received = 0
     
     try:
         browser_config = get_browser_config()
-        crawler_config = get_crawler_config()
+        crawler_config = get_crawler_config(scan_full_page=deep, magic=deep)
         logger.info("Initializing crawler with browser config: %s", browser_config)
         logger.info("Using crawler config: %s", crawler_config)
-        
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            for page in pages:
-                if page.url in crawled_urls:
-                    continue
-                    
-                try:
-                    logger.info(f"Crawling page: {page.url}")
-                    result = await crawler.arun(url=page.url, config=crawler_config)
-                    
-                    if result and hasattr(result, 'markdown_v2') and result.markdown_v2:
-                        page_markdown = f"# {page.title or 'Untitled Page'}\n"
-                        page_markdown += f"URL: {page.url}\n\n"
-                        
-                        content = None
-                        if hasattr(result.markdown_v2, 'fit_markdown') and result.markdown_v2.fit_markdown:
-                            content = result.markdown_v2.fit_markdown
-                            logger.info(f"Using fit_markdown for {page.url}")
-                        elif hasattr(result.markdown_v2, 'raw_markdown') and result.markdown_v2.raw_markdown:
-                            content = result.markdown_v2.raw_markdown
-                            logger.info(f"Falling back to raw_markdown for {page.url}")
-                        
-                        if content:
-                            filtered_lines = []
-                            skip_next = False
-                            for line in content.split('\n'):
-                                if skip_next:
-                                    skip_next = False
-                                    continue
-                                    
-                                if 'To navigate the symbols, press' in line:
-                                    skip_next = True
-                                    continue
-                                    
-                                if any(x in line for x in [
-                                    'Skip Navigation',
-                                    'Search...',
-                                    '⌘K',
-                                    'symbols inside <root>'
-                                ]):
-                                    continue
-                                    
-                                filtered_lines.append(line)
-                            
-                            filtered_content = '\n'.join(filtered_lines).strip()
-                            if filtered_content:
-                                page_markdown += filtered_content
-                                page_markdown += "\n\n---\n\n"
-                                all_markdown.append(page_markdown)
-                                total_size += len(page_markdown.encode('utf-8'))
-                                logger.info(f"Successfully extracted content from {page.url}")
-                                
-                                # Mark URL as crawled
-                                crawled_urls.add(page.url)
-                                page.status = "crawled"
-                            else:
-                                logger.warning(f"Skipping {page.url} - filtered content was empty")
-                                errors += 1
-                                page.status = "error"
-                        else:
-                            logger.warning(f"Skipping {page.url} - no markdown content available")
-                            errors += 1
-                            page.status = "error"
-                    else:
-                        logger.warning(f"Skipping {page.url} - no valid result")
+
+        session = await get_session()
+        async with _use_crawler(crawler) as crawler:
+            unique_pages = []
+            # Results of pages that finished ahead of an earlier page, keyed by index.
+            # Sections are written to the buffer in arrival order as soon as every
+            # earlier page is done, so only out-of-order results are held in memory
+            finished = {}
+            next_index = 0
+            queue: asyncio.Queue = asyncio.Queue()
+
+            def write_finished():
+                nonlocal next_index, total_size, errors
+                while next_index in finished:
+                    page = unique_pages[next_index]
+                    result = finished.pop(next_index)
+                    next_index += 1
+
+                    if isinstance(result, Exception):
+                        logger.error("Error crawling page %s: %s", page.url, result)
                         errors += 1
-                        page.status = "error"
-                        
-                except Exception as e:
-                    logger.error(f"Error crawling page {page.url}: {str(e)}")
-                    errors += 1
-                    page.status = "error"
+                        continue
 
-            combined_markdown = "".join(all_markdown)
-            
-            size_str = f"{total_size} B"
-            if total_size > 1024:
-                size_str = f"{total_size/1024:.2f} KB"
-            if total_size > 1024*1024:
-                size_str = f"{total_size/(1024*1024):.2f} MB"
+                    page_markdown = _extract_page_markdown(page, result)
+                    if page_markdown is None:
+                        errors += 1
+                        continue
+
+                    # Encode each page once; the buffer length doubles as the size counter
+                    chunk = page_markdown.encode('utf-8')
+                    markdown_buffer.write(chunk)
+                    total_size += len(chunk)
+                    logger.info("Successfully extracted content from %s", page.url)
+                    crawled_urls.add(page.url)
+
+            async def worker():
+                while True:
+                    index, page = await queue.get()
+                    try:
+                        finished[index] = await _fetch_or_render(page, session, crawler, crawler_config, deep)
+                    except Exception as e:
+                        finished[index] = e
+                    finally:
+                        write_finished()
+                        queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(CRAWL_CONCURRENCY)]
+            try:
+                # Skip duplicate URLs so each page is only fetched once
+                queued_urls = set()
+                async for page in _iter_pages(pages):
+                    pages_received += 1
+                    key = normalize_url(page.url)
+                    if key in queued_urls:
+                        continue
+                    queued_urls.add(key)
+                    unique_pages.append(page)
+                    queue.put_nowait((len(unique_pages) - 1, page))
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            # Decode straight from the buffer's memory rather than a getvalue() copy
+            combined_markdown = str(markdown_buffer.getbuffer(), 'utf-8')
             
             stats = CrawlStats(
-                subdomains_parsed=len(pages),
+                subdomains_parsed=pages_received,
                 pages_crawled=len(crawled_urls),
-                data_extracted=size_str,
+                data_extracted=format_size(total_size),
                 errors_encountered=errors
             )
             
-            logger.info(f"Completed crawling with stats: {stats}")
+            logger.info("Completed crawling with stats: %s", stats)
             return CrawlResult(
                 markdown=combined_markdown,
                 stats=stats
             )
             
     except Exception as e:
-        logger.error(f"Error in crawl_pages: {str(e)}")
+        logger.error("Error in crawl_pages: %s", e)
         return CrawlResult(
             markdown="",
             stats=CrawlStats(
-                subdomains_parsed=len(pages),
+                subdomains_parsed=pages_received,
                 pages_crawled=0,
                 data_extracted="0 KB",
                 errors_encountered=1
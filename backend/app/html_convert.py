@@ -0,0 +1,50 @@
+import os
+from functools import lru_cache
+from bs4 import BeautifulSoup
+from crawl4ai.content_filter_strategy import PruningContentFilter
+from crawl4ai.content_scraping_strategy import WebScrapingStrategy
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+# HTML-to-markdown conversion for server-rendered pages. These functions run in
+# the crawler's conversion process pool, and every worker imports this module to
+# unpickle them, so keep its imports light (no aiohttp, cache or FastAPI)
+
+# Settings that shape the extracted markdown, shared by rendered and static pages
+WORD_COUNT_THRESHOLD = 5
+PRUNING_FILTER_OPTIONS = {"threshold": 0.2, "threshold_type": "dynamic", "min_word_threshold": 5}
+HTML2TEXT_OPTIONS = {"body_width": 80, "ignore_images": True, "escape_html": True}
+
+# Static HTML is used without a browser render when its visible text makes up more
+# than this share of the markup and no SPA mount point is left empty
+STATIC_TEXT_RATIO = float(os.getenv("STATIC_TEXT_RATIO", "0.1"))
+SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt")
+
+@lru_cache(maxsize=1)
+def get_markdown_generator() -> DefaultMarkdownGenerator:
+    """Get the markdown generator shared by rendered and static (HTTP-only) pages"""
+    return DefaultMarkdownGenerator(
+        content_filter=PruningContentFilter(**PRUNING_FILTER_OPTIONS),
+        options=dict(HTML2TEXT_OPTIONS)
+    )
+
+def is_static_html(html: str) -> bool:
+    """Check whether raw HTML already carries the page content, i.e. needs no JS render"""
+    soup = BeautifulSoup(html, 'lxml')
+    for root_id in SPA_ROOT_IDS:
+        root = soup.find(id=root_id)
+        if root is not None and not root.get_text(strip=True):
+            return False
+
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    text_ratio = len(soup.get_text(strip=True)) / max(len(html), 1)
+    return text_ratio > STATIC_TEXT_RATIO
+
+def convert_static_html(html: str, base_url: str):
+    """Convert server-rendered HTML to markdown, or return None if it needs a browser render"""
+    if not is_static_html(html):
+        return None
+    # Clean the page the same way crawler.arun does before generating markdown,
+    # so static and rendered pages drop the same boilerplate and short blocks
+    scraped = WebScrapingStrategy().scrap(base_url, html, word_count_threshold=WORD_COUNT_THRESHOLD)
+    return get_markdown_generator().generate_markdown(scraped.cleaned_html or "", base_url=base_url)
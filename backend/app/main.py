@@ -6,8 +6,10 @@ import uvicorn
 import logging
 import psutil
 import os
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from pathlib import Path
-from .crawler import discover_pages, crawl_pages, DiscoveredPage, CrawlResult
+from .crawler import discover_pages, crawl_pages, get_crawler, close_crawler, close_session, shutdown_convert_pool, DiscoveredPage, CrawlResult
 
 # Configure logging
 logging.basicConfig(
@@ -16,7 +18,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Crawl4AI Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the shared crawler's browser, HTTP session and conversion workers when the server shuts down"""
+    yield
+    await close_crawler()
+    await close_session()
+    shutdown_convert_pool()
+
+app = FastAPI(title="Crawl4AI Backend", lifespan=lifespan)
 
 # Configure CORS to allow requests from our frontend
 app.add_middleware(
@@ -35,6 +45,7 @@ app.add_middleware(
 class DiscoverRequest(BaseModel):
     url: str
     depth: int = Field(default=3, ge=1, le=5)  # Enforce depth between 1 and 5
+    deep: bool = False  # Scroll full pages and enable magic mode (slower)
 
     @validator('depth')
     def validate_depth(cls, v):
@@ -44,6 +55,7 @@ class DiscoverRequest(BaseModel):
 
 class CrawlRequest(BaseModel):
     pages: List[DiscoveredPage]
+    deep: bool = False  # Scroll full pages and enable magic mode (slower)
 
 class MCPStatusResponse(BaseModel):
     status: str
@@ -169,7 +181,15 @@ async def discover_endpoint(request: DiscoverRequest):
     """Discover pages related to the provided URL"""
     try:
         logger.info(f"Received discover request for URL: {request.url} with depth: {request.depth}")
-        pages = await discover_pages(request.url, max_depth=request.depth)
+        crawler = await get_crawler()
+        pages = [
+            page async for page in discover_pages(
+                request.url,
+                max_depth=request.depth,
+                crawler=crawler,
+                deep=request.deep
+            )
+        ]
         
         # Log the results
         if pages:
@@ -200,13 +220,14 @@ async def crawl_endpoint(request: CrawlRequest):
     """Crawl the provided pages and generate markdown content"""
     try:
         logger.info(f"Received crawl request for {len(request.pages)} pages")
-        result = await crawl_pages(request.pages)
+        crawler = await get_crawler()
+        result = await crawl_pages(request.pages, crawler=crawler, deep=request.deep)
         
         # Log the results
         logger.info(f"Successfully crawled pages. Stats: {result.stats}")
         return {
             "markdown": result.markdown,
-            "stats": result.stats.dict(),
+            "stats": asdict(result.stats),
             "success": True
         }
     except Exception as e:
@@ -224,6 +245,42 @@ async def crawl_endpoint(request: CrawlRequest):
             "error": str(e)
         }
 
+@app.post("/api/discover-and-crawl")
+async def discover_and_crawl_endpoint(request: DiscoverRequest):
+    """Discover pages from the provided URL and crawl them as they are found"""
+    try:
+        logger.info(f"Received discover-and-crawl request for URL: {request.url} with depth: {request.depth}")
+        crawler = await get_crawler()
+        # Crawling consumes discovered pages as they are yielded, so the two phases overlap
+        pages = discover_pages(
+            request.url,
+            max_depth=request.depth,
+            crawler=crawler,
+            deep=request.deep
+        )
+        result = await crawl_pages(pages, crawler=crawler, deep=request.deep)
+
+        logger.info(f"Successfully discovered and crawled pages. Stats: {result.stats}")
+        return {
+            "markdown": result.markdown,
+            "stats": asdict(result.stats),
+            "success": True
+        }
+    except Exception as e:
+        logger.error(f"Error discovering and crawling pages: {str(e)}", exc_info=True)
+        # Return a structured error response
+        return {
+            "markdown": "",
+            "stats": {
+                "subdomains_parsed": 0,
+                "pages_crawled": 0,
+                "data_extracted": "0 KB",
+                "errors_encountered": 1
+            },
+            "success": False,
+            "error": str(e)
+        }
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
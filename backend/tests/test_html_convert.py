@@ -0,0 +1,34 @@
+from app.html_convert import convert_static_html, is_static_html
+
+STATIC_PAGE = """
+<html>
+  <head><title>Getting started</title></head>
+  <body>
+    <nav><a href="/">Home</a> <a href="/docs">Docs</a></nav>
+    <main>
+      <h1>Getting started</h1>
+      <p>Install the package with pip and import the client in your application code.</p>
+      <p>The client reads its configuration from environment variables at startup time.</p>
+    </main>
+  </body>
+</html>
+"""
+
+SPA_PAGE = """
+<html>
+  <body>
+    <div id="root"></div>
+    <script src="/static/js/main.js"></script>
+  </body>
+</html>
+"""
+
+def test_convert_static_html_returns_markdown():
+    markdown = convert_static_html(STATIC_PAGE, "https://docs.example.com/start")
+    assert markdown is not None
+    content = markdown.fit_markdown or markdown.raw_markdown
+    assert "Install the package with pip" in content
+
+def test_convert_static_html_skips_empty_spa_shell():
+    assert not is_static_html(SPA_PAGE)
+    assert convert_static_html(SPA_PAGE, "https://docs.example.com/") is None